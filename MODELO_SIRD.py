@@ -1,25 +1,186 @@
 # Importamos las librerías necesarias
 from dash import Dash, dcc, html, Input, Output  # Dash para la interfaz y componentes interactivos
 import numpy as np  # Para realizar cálculos y manejar datos numéricos
-from scipy.integrate import odeint  # Para resolver ecuaciones diferenciales
+from numba import njit, prange  # Para compilar el integrador a código máquina y paralelizarlo
+from CyRK import pysolve_ivp  # Integrador adaptativo compilado (Cython) para parámetros con tasas altas
+import plotly.io as pio  # Para elegir el codificador JSON de las gráficas
+import functools  # Para guardar en caché los resultados ya calculados
 import os
 
 # Es necesario instalar estas librerías antes de ejecutar el código:
 # pip install dash
 # pip install numpy
-# pip install scipy
+# pip install numba
+# pip install CyRK
+# pip install orjson
+
+# Usamos orjson para convertir las gráficas a JSON: serializa los arrays de numpy
+# directamente en C en lugar de recorrerlos elemento a elemento
+pio.json.config.default_engine = "orjson"
 
 # Creamos la aplicación Dash
 app = Dash(__name__)
 
-# Definimos el modelo SIRD con ecuaciones diferenciales
-def sird_model(y, t, beta, rho, delta, alpha, lambda_):
-    S, I, R = y  # Variables: Susceptibles (S), Infectados (I), Recuperados (R)
-    # Ecuaciones diferenciales para el modelo SIRD
-    dSdt = alpha - beta * S * I + lambda_ * R  # Cambio en los susceptibles
-    dIdt = beta * S * I - delta * I - rho * I  # Cambio en los infectados
-    dRdt = rho * I - lambda_ * R  # Cambio en los recuperados
-    return [dSdt, dIdt, dRdt]  # Retornamos las derivadas
+# Tiempo de simulación: 160 días con un punto por día
+_T_EVAL = np.linspace(0.0, 160.0, 161)
+_T_EVAL.flags.writeable = False  # Se comparte entre llamadas: evitamos modificarlo por accidente
+
+# Condiciones iniciales del modelo (S0, I0, R0): 99% susceptible, 1% infectada
+_Y0_SIRD = np.array([0.99, 0.01, 0.0])
+_Y0_SIRD.flags.writeable = False
+
+# Error máximo admitido para el RK4 de paso fijo, estimado por duplicación de paso;
+# si se supera se usa el integrador adaptativo RK45 de CyRK
+_RK4_TOL = 1e-6
+
+# Límite de pasos del integrador adaptativo: sobra para tasas de hasta ~300, y con parámetros
+# que hacen divergir el modelo (por ejemplo rho < 0) corta la integración en unas décimas de segundo
+_MAX_NUM_STEPS = 20000
+
+# Integramos el modelo SIRD con Runge-Kutta de orden 4 y paso fijo de 1/substeps días,
+# guardando un punto por día. Las ecuaciones del modelo se escriben directamente en cada
+# etapa para que S, I y R se mantengan como escalares dentro del código compilado.
+# Con un solo sub-paso por día el error frente a odeint ya supera 1e-4 desde beta ~0.35
+# y llega a ~1e-2 con beta = 1.5, así que el paso fijo no es fiable por sí solo.
+@njit(cache=True, fastmath=True)
+def integrate_sird(y0, beta, rho, delta, alpha, lambda_, steps, substeps):
+    out = np.empty((3, steps))  # Resultados: una fila contigua por variable (S, I, R), una columna por día
+    S, I, R = y0[0], y0[1], y0[2]  # Variables: Susceptibles (S), Infectados (I), Recuperados (R)
+    h = 1.0 / substeps  # Paso de integración (fracción de día)
+    out[0, 0], out[1, 0], out[2, 0] = S, I, R
+    for k in range(1, steps):
+        for _ in range(substeps):  # Sub-pasos dentro de cada día
+            # Etapa 1: ecuaciones diferenciales del modelo SIRD en el punto actual
+            k1S = alpha - beta * S * I + lambda_ * R  # Cambio en los susceptibles
+            k1I = beta * S * I - delta * I - rho * I  # Cambio en los infectados
+            k1R = rho * I - lambda_ * R  # Cambio en los recuperados
+            # Etapa 2: punto medio usando la pendiente de la etapa 1
+            S2, I2, R2 = S + 0.5 * h * k1S, I + 0.5 * h * k1I, R + 0.5 * h * k1R
+            k2S = alpha - beta * S2 * I2 + lambda_ * R2
+            k2I = beta * S2 * I2 - delta * I2 - rho * I2
+            k2R = rho * I2 - lambda_ * R2
+            # Etapa 3: punto medio usando la pendiente de la etapa 2
+            S3, I3, R3 = S + 0.5 * h * k2S, I + 0.5 * h * k2I, R + 0.5 * h * k2R
+            k3S = alpha - beta * S3 * I3 + lambda_ * R3
+            k3I = beta * S3 * I3 - delta * I3 - rho * I3
+            k3R = rho * I3 - lambda_ * R3
+            # Etapa 4: final del paso usando la pendiente de la etapa 3
+            S4, I4, R4 = S + h * k3S, I + h * k3I, R + h * k3R
+            k4S = alpha - beta * S4 * I4 + lambda_ * R4
+            k4I = beta * S4 * I4 - delta * I4 - rho * I4
+            k4R = rho * I4 - lambda_ * R4
+            # Avanzamos un paso combinando las cuatro pendientes
+            S += h / 6.0 * (k1S + 2.0 * k2S + 2.0 * k3S + k4S)
+            I += h / 6.0 * (k1I + 2.0 * k2I + 2.0 * k3I + k4I)
+            R += h / 6.0 * (k1R + 2.0 * k2R + 2.0 * k3R + k4R)
+        out[0, k], out[1, k], out[2, k] = S, I, R
+    return out
+
+# Definimos el modelo SIRD con ecuaciones diferenciales, para el integrador adaptativo.
+# Escribe las derivadas en `dy`; con la firma explícita se compila al importar el módulo
+# y la primera simulación con el integrador adaptativo no tiene que esperar a numba.
+@njit("void(float64[::1], float64, float64[::1], float64, float64, float64, float64, float64)", cache=True)
+def sird_model(dy, t, y, beta, rho, delta, alpha, lambda_):
+    S, I, R = y[0], y[1], y[2]  # Variables: Susceptibles (S), Infectados (I), Recuperados (R)
+    dy[0] = alpha - beta * S * I + lambda_ * R  # Cambio en los susceptibles
+    dy[1] = beta * S * I - delta * I - rho * I  # Cambio en los infectados
+    dy[2] = rho * I - lambda_ * R  # Cambio en los recuperados
+
+# Integramos varias combinaciones de parámetros a la vez: cada fila de `params` es
+# (beta, rho, delta, alpha, lambda) y las integraciones se reparten entre los núcleos.
+# Igual que en _solve, cada fila se integra con `substeps` y con el doble de sub-pasos y sólo
+# se acepta si el error estimado no supera _RK4_TOL. Las filas que no pasan la comprobación
+# quedan con `ok` a False y rellenas de NaN; para ellas hay que usar _solve, que recurre al
+# integrador adaptativo.
+@njit(parallel=True, cache=True)
+def solve_batch(y0, params, steps, substeps):
+    K = params.shape[0]  # Número de combinaciones de parámetros
+    out = np.empty((K, 3, steps))  # Resultados: una solución (S, I, R x días) por combinación
+    ok = np.empty(K, dtype=np.bool_)  # Filas cuya solución cumple la tolerancia
+    for k in prange(K):
+        coarse = integrate_sird(y0, params[k, 0], params[k, 1], params[k, 2], params[k, 3], params[k, 4],
+                                steps, substeps)
+        fine = integrate_sird(y0, params[k, 0], params[k, 1], params[k, 2], params[k, 3], params[k, 4],
+                              steps, 2 * substeps)
+        ok[k] = np.abs(fine - coarse).max() / 15.0 <= _RK4_TOL  # Con NaN la comparación es falsa
+        if ok[k]:
+            out[k] = fine
+        else:
+            out[k] = np.nan
+    return out, ok
+
+# Resolvemos el modelo para unos parámetros dados. El resultado se guarda en caché,
+# así que volver a una combinación ya vista no repite la integración.
+@functools.lru_cache(maxsize=256)
+def _solve(beta, rho, delta, alpha, lambda_):
+    # Con alpha = lambda = 0 se cumple S = S0 * exp(-beta * (R - R0) / rho), pero R(t) no tiene
+    # forma cerrada: reducir el sistema a una sola ecuación en R resulta más lento (una
+    # exponencial por etapa) que el RK4 compilado, así que no se trata como caso especial.
+
+    # Integramos con paso de un día y de medio día: con RK4 la diferencia entre ambas es unas
+    # 15 veces el error de la de medio día, así que sólo la usamos si esa estimación es pequeña
+    coarse = integrate_sird(_Y0_SIRD, beta, rho, delta, alpha, lambda_, _T_EVAL.size, 1)
+    fine = integrate_sird(_Y0_SIRD, beta, rho, delta, alpha, lambda_, _T_EVAL.size, 2)
+    if np.abs(fine - coarse).max() / 15.0 <= _RK4_TOL:  # Con NaN la comparación es falsa
+        solution = fine
+    else:
+        sol = pysolve_ivp(sird_model, (_T_EVAL[0], _T_EVAL[-1]), _Y0_SIRD, method="RK45", t_eval=_T_EVAL,
+                          args=(beta, rho, delta, alpha, lambda_), rtol=1e-6, atol=1e-9, pass_dy_as_arg=True,
+                          max_num_steps=_MAX_NUM_STEPS)
+        if sol.success:
+            solution = np.ascontiguousarray(sol.y)  # Una fila contigua por variable
+        else:
+            # Si no termina, sol.y sólo cubre parte de los días: devolvemos NaN en todos para
+            # no dibujar (ni guardar en caché) una curva más corta que _T_EVAL
+            solution = np.full((_Y0_SIRD.size, _T_EVAL.size), np.nan)
+    # Con float32 basta para dibujar las curvas y se envía la mitad de datos al navegador
+    solution = solution.astype(np.float32)
+    solution.flags.writeable = False  # Los arrays en caché se comparten entre llamadas
+    S, I, R = solution  # Extraemos los resultados: cada fila es contigua en memoria
+    return S, I, R
+
+# Construimos la gráfica del modelo SIRD para unos parámetros dados
+def make_figure(beta, rho, delta, alpha, lambda_):
+    # Resolución de las ecuaciones diferenciales (en float y redondeados para reutilizar la caché
+    # y no compilar otra versión del integrador cuando Dash envía un entero)
+    S, I, R = _solve(round(float(beta), 6), round(float(rho), 6), round(float(delta), 6), round(float(alpha), 6),
+                     round(float(lambda_), 6))
+
+    # Configuración de la gráfica
+    fig = {
+        "data": [
+            {"x": _T_EVAL, "y": S, "type": "line", "name": "Susceptibles", "line": {"color": "#1f77b4"}},
+            {"x": _T_EVAL, "y": I, "type": "line", "name": "Infectados", "line": {"color": "#ff7f0e"}},
+            {"x": _T_EVAL, "y": R, "type": "line", "name": "Recuperados", "line": {"color": "#2ca02c"}},
+        ],
+        "layout": {
+            "title": "Modelo SIRD",  # Título de la gráfica
+            "xaxis": {"title": "Tiempo"},
+            "yaxis": {"title": "Proporción de la población"},
+            'plot_bgcolor': '#ffffff',
+            'paper_bgcolor': '#f4f6f9',
+        },
+    }
+    return fig
+
+# Valores iniciales de los parámetros, por id del campo de entrada y en el orden de make_figure
+_DEFAULTS = {"beta": 0.3, "rho": 0.1, "delta": 0.05, "alpha": 0.01, "lambda": 0.01}
+
+# Precalculamos la gráfica con los valores iniciales de los campos de entrada, así la
+# primera carga de la página no tiene que esperar a resolver el modelo
+_DEFAULT_FIG = make_figure(*_DEFAULTS.values())
+
+# Estilos compartidos por las etiquetas y los campos de entrada de los parámetros
+_LABEL_STYLE = {'fontSize': '14px', 'fontWeight': '500'}
+_INPUT_STYLE = {
+    'width': '100%',
+    'padding': '12px',
+    'fontSize': '14px',
+    'borderRadius': '10px',
+    'border': '1px solid #ddd',
+    'backgroundColor': '#f9f9f9',
+    'color': '#333',
+}
 
 # Definimos el diseño (layout) de la aplicación Dash
 app.layout = html.Div(
@@ -60,56 +221,16 @@ app.layout = html.Div(
                     }
                 ),
                 # Campos de entrada para cada parámetro del modelo
-                html.Label("β (Tasa de contacto):", style={'fontSize': '14px', 'fontWeight': '500'}),
-                dcc.Input(id="beta", type="number", value=0.3, step=0.01, style={
-                    'width': '100%',
-                    'padding': '12px',
-                    'fontSize': '14px',
-                    'borderRadius': '10px',
-                    'border': '1px solid #ddd',
-                    'backgroundColor': '#f9f9f9',
-                    'color': '#333',
-                }),
-                html.Label("ρ (Tasa de recuperación):", style={'fontSize': '14px', 'fontWeight': '500'}),
-                dcc.Input(id="rho", type="number", value=0.1, step=0.01, style={
-                    'width': '100%',
-                    'padding': '12px',
-                    'fontSize': '14px',
-                    'borderRadius': '10px',
-                    'border': '1px solid #ddd',
-                    'backgroundColor': '#f9f9f9',
-                    'color': '#333',
-                }),
-                html.Label("δ (Tasa de mortalidad):", style={'fontSize': '14px', 'fontWeight': '500'}),
-                dcc.Input(id="delta", type="number", value=0.05, step=0.01, style={
-                    'width': '100%',
-                    'padding': '12px',
-                    'fontSize': '14px',
-                    'borderRadius': '10px',
-                    'border': '1px solid #ddd',
-                    'backgroundColor': '#f9f9f9',
-                    'color': '#333',
-                }),
-                html.Label("α (Ingreso de susceptibles):", style={'fontSize': '14px', 'fontWeight': '500'}),
-                dcc.Input(id="alpha", type="number", value=0.01, step=0.01, style={
-                    'width': '100%',
-                    'padding': '12px',
-                    'fontSize': '14px',
-                    'borderRadius': '10px',
-                    'border': '1px solid #ddd',
-                    'backgroundColor': '#f9f9f9',
-                    'color': '#333',
-                }),
-                html.Label("λ (Reinfección):", style={'fontSize': '14px', 'fontWeight': '500'}),
-                dcc.Input(id="lambda", type="number", value=0.01, step=0.01, style={
-                    'width': '100%',
-                    'padding': '12px',
-                    'fontSize': '14px',
-                    'borderRadius': '10px',
-                    'border': '1px solid #ddd',
-                    'backgroundColor': '#f9f9f9',
-                    'color': '#333',
-                }),
+                html.Label("β (Tasa de contacto):", style=_LABEL_STYLE),
+                dcc.Input(id="beta", type="number", value=_DEFAULTS["beta"], step=0.01, debounce=True, style=_INPUT_STYLE),
+                html.Label("ρ (Tasa de recuperación):", style=_LABEL_STYLE),
+                dcc.Input(id="rho", type="number", value=_DEFAULTS["rho"], step=0.01, debounce=True, style=_INPUT_STYLE),
+                html.Label("δ (Tasa de mortalidad):", style=_LABEL_STYLE),
+                dcc.Input(id="delta", type="number", value=_DEFAULTS["delta"], step=0.01, debounce=True, style=_INPUT_STYLE),
+                html.Label("α (Ingreso de susceptibles):", style=_LABEL_STYLE),
+                dcc.Input(id="alpha", type="number", value=_DEFAULTS["alpha"], step=0.01, debounce=True, style=_INPUT_STYLE),
+                html.Label("λ (Reinfección):", style=_LABEL_STYLE),
+                dcc.Input(id="lambda", type="number", value=_DEFAULTS["lambda"], step=0.01, debounce=True, style=_INPUT_STYLE),
             ]
         ),
         # Segundo bloque: Gráfica del modelo SIRD
@@ -120,7 +241,7 @@ app.layout = html.Div(
                 'height': '600px',  # Tamaño del área gráfica
                 'marginLeft': '30px'
             },
-            children=[dcc.Graph(id="sird-graph")]  # Gráfica generada por Dash
+            children=[dcc.Graph(id="sird-graph", figure=_DEFAULT_FIG)]  # Gráfica generada por Dash
         ),
     ]
 )
@@ -132,34 +253,11 @@ app.layout = html.Div(
      Input("rho", "value"),
      Input("delta", "value"),
      Input("alpha", "value"),
-     Input("lambda", "value")]
+     Input("lambda", "value")],
+    prevent_initial_call=True  # La gráfica inicial ya viene precalculada en el layout
 )
 def update_graph(beta, rho, delta, alpha, lambda_):
-    # Condiciones iniciales del modelo
-    S0, I0, R0 = 0.99, 0.01, 0.0  # Población inicial: 99% susceptible, 1% infectada
-    y0 = [S0, I0, R0]  # Vector de condiciones iniciales
-    t = np.linspace(0, 160, 160)  # Tiempo de simulación (160 días)
-
-    # Resolución de las ecuaciones diferenciales
-    solution = odeint(sird_model, y0, t, args=(beta, rho, delta, alpha, lambda_))
-    S, I, R = solution.T  # Extraemos los resultados: S, I, R
-
-    # Configuración de la gráfica
-    fig = {
-        "data": [
-            {"x": t, "y": S, "type": "line", "name": "Susceptibles", "line": {"color": "#1f77b4"}},
-            {"x": t, "y": I, "type": "line", "name": "Infectados", "line": {"color": "#ff7f0e"}},
-            {"x": t, "y": R, "type": "line", "name": "Recuperados", "line": {"color": "#2ca02c"}},
-        ],
-        "layout": {
-            "title": "Modelo SIRD",  # Título de la gráfica
-            "xaxis": {"title": "Tiempo"},
-            "yaxis": {"title": "Proporción de la población"},
-            'plot_bgcolor': '#ffffff',
-            'paper_bgcolor': '#f4f6f9',
-        },
-    }
-    return fig  # Retornamos la gráfica actualizada
+    return make_figure(beta, rho, delta, alpha, lambda_)  # Retornamos la gráfica actualizada
 
 # Ejecutamos la aplicación en el host local
 if __name__ == "__main__":
@@ -1,29 +1,201 @@
 # Importando las librerías necesarias
 from dash import Dash, dcc, html, Input, Output  # Dash es para la creación de aplicaciones web interactivas.
 import numpy as np  # Usado para crear y manejar arrays y cálculos numéricos.
-from scipy.integrate import odeint  # Para resolver ecuaciones diferenciales.
-import plotly.graph_objects as go  # Para crear gráficos interactivos.
+from numba import njit, prange  # Para compilar el integrador a código máquina y paralelizarlo.
+from CyRK import pysolve_ivp  # Integrador adaptativo compilado (Cython) para parámetros con tasas altas.
+import plotly.io as pio  # Para elegir el codificador JSON de las gráficas.
+import functools  # Para guardar en caché los resultados ya calculados.
 import os
 
 # Es necesario instalar estas librerías antes de ejecutar el código:
 # pip install dash
 # pip install dcc
-# pip install odeint
 # pip install numpy
+# pip install numba
+# pip install CyRK
+# pip install orjson
 # pip install plotly
 
 
+# Usamos orjson para convertir las gráficas a JSON: serializa los arrays de numpy
+# directamente en C en lugar de recorrerlos elemento a elemento
+pio.json.config.default_engine = "orjson"
+
 # Creamos la aplicación Dash
 app = Dash(__name__)
 
-# Definimos el modelo SLIRD (Susceptibles, Latentes, Infectados, Recuperados, Muertos).
-def slird_model(y, t, beta, rho, delta, alpha, lambda_, gamma):
-    S, L, I, R = y  # Desempaquetamos las variables de estado
-    dSdt = alpha - beta * S * I + lambda_ * R  # Ecuación diferencial para los susceptibles
-    dLdt = beta * S * I - gamma * L  # Ecuación diferencial para los latentes
-    dIdt = gamma * L - delta * I - rho * I  # Ecuación diferencial para los infectados
-    dRdt = rho * I - lambda_ * R  # Ecuación diferencial para los recuperados
-    return [dSdt, dLdt, dIdt, dRdt]  # Retornamos las ecuaciones diferenciales
+# Tiempo de simulación: 160 días con un punto por día
+_T_EVAL = np.linspace(0.0, 160.0, 161)
+_T_EVAL.flags.writeable = False  # Se comparte entre llamadas: evitamos modificarlo por accidente
+
+# Condiciones iniciales (S0, L0, I0, R0): 99% susceptible, 1% infectada
+_Y0_SLIRD = np.array([0.99, 0.0, 0.01, 0.0])
+_Y0_SLIRD.flags.writeable = False
+
+# Error máximo admitido para el RK4 de paso fijo, estimado por duplicación de paso;
+# si se supera se usa el integrador adaptativo RK45 de CyRK
+_RK4_TOL = 1e-6
+
+# Límite de pasos del integrador adaptativo: sobra para tasas de hasta ~300, y con parámetros
+# que hacen divergir el modelo (por ejemplo rho < 0) corta la integración en unas décimas de segundo
+_MAX_NUM_STEPS = 20000
+
+# Integramos el modelo SLIRD (Susceptibles, Latentes, Infectados, Recuperados, Muertos)
+# con Runge-Kutta de orden 4 y paso fijo de 1/substeps días, guardando un punto por día.
+# Las ecuaciones se escriben directamente en cada etapa para trabajar sólo con escalares.
+# Con un solo sub-paso por día el error frente a odeint supera 1e-4 desde beta ~0.3 si
+# gamma es alto (gamma = 1) y llega a ~1.4e-3, así que el paso fijo no es fiable por sí solo.
+@njit(cache=True, fastmath=True)
+def integrate_slird(y0, beta, rho, delta, alpha, lambda_, gamma, steps, substeps):
+    out = np.empty((4, steps))  # Resultados: una fila contigua por variable (S, L, I, R), una columna por día
+    S, L, I, R = y0[0], y0[1], y0[2], y0[3]  # Desempaquetamos las variables de estado
+    h = 1.0 / substeps  # Paso de integración (fracción de día)
+    out[0, 0], out[1, 0], out[2, 0], out[3, 0] = S, L, I, R
+    for k in range(1, steps):
+        for _ in range(substeps):  # Sub-pasos dentro de cada día
+            # Etapa 1: ecuaciones diferenciales del modelo SLIRD en el punto actual
+            k1S = alpha - beta * S * I + lambda_ * R  # Susceptibles
+            k1L = beta * S * I - gamma * L  # Latentes
+            k1I = gamma * L - delta * I - rho * I  # Infectados
+            k1R = rho * I - lambda_ * R  # Recuperados
+            # Etapa 2: punto medio usando la pendiente de la etapa 1
+            S2, L2, I2, R2 = S + 0.5 * h * k1S, L + 0.5 * h * k1L, I + 0.5 * h * k1I, R + 0.5 * h * k1R
+            k2S = alpha - beta * S2 * I2 + lambda_ * R2
+            k2L = beta * S2 * I2 - gamma * L2
+            k2I = gamma * L2 - delta * I2 - rho * I2
+            k2R = rho * I2 - lambda_ * R2
+            # Etapa 3: punto medio usando la pendiente de la etapa 2
+            S3, L3, I3, R3 = S + 0.5 * h * k2S, L + 0.5 * h * k2L, I + 0.5 * h * k2I, R + 0.5 * h * k2R
+            k3S = alpha - beta * S3 * I3 + lambda_ * R3
+            k3L = beta * S3 * I3 - gamma * L3
+            k3I = gamma * L3 - delta * I3 - rho * I3
+            k3R = rho * I3 - lambda_ * R3
+            # Etapa 4: final del paso usando la pendiente de la etapa 3
+            S4, L4, I4, R4 = S + h * k3S, L + h * k3L, I + h * k3I, R + h * k3R
+            k4S = alpha - beta * S4 * I4 + lambda_ * R4
+            k4L = beta * S4 * I4 - gamma * L4
+            k4I = gamma * L4 - delta * I4 - rho * I4
+            k4R = rho * I4 - lambda_ * R4
+            # Avanzamos un paso combinando las cuatro pendientes
+            S += h / 6.0 * (k1S + 2.0 * k2S + 2.0 * k3S + k4S)
+            L += h / 6.0 * (k1L + 2.0 * k2L + 2.0 * k3L + k4L)
+            I += h / 6.0 * (k1I + 2.0 * k2I + 2.0 * k3I + k4I)
+            R += h / 6.0 * (k1R + 2.0 * k2R + 2.0 * k3R + k4R)
+        out[0, k], out[1, k], out[2, k], out[3, k] = S, L, I, R
+    return out
+
+# Definimos el modelo SLIRD (Susceptibles, Latentes, Infectados, Recuperados, Muertos) para el
+# integrador adaptativo. Escribe las derivadas en `dy`; con la firma explícita se compila al
+# importar el módulo y la primera simulación adaptativa no tiene que esperar a numba.
+@njit("void(float64[::1], float64, float64[::1], float64, float64, float64, float64, float64, float64)", cache=True)
+def slird_model(dy, t, y, beta, rho, delta, alpha, lambda_, gamma):
+    S, L, I, R = y[0], y[1], y[2], y[3]  # Desempaquetamos las variables de estado
+    dy[0] = alpha - beta * S * I + lambda_ * R  # Ecuación diferencial para los susceptibles
+    dy[1] = beta * S * I - gamma * L  # Ecuación diferencial para los latentes
+    dy[2] = gamma * L - delta * I - rho * I  # Ecuación diferencial para los infectados
+    dy[3] = rho * I - lambda_ * R  # Ecuación diferencial para los recuperados
+
+# Integramos varias combinaciones de parámetros a la vez: cada fila de `params` es
+# (beta, rho, delta, alpha, lambda, gamma) y las integraciones se reparten entre los núcleos.
+# Igual que en _solve, cada fila se integra con `substeps` y con el doble de sub-pasos y sólo
+# se acepta si el error estimado no supera _RK4_TOL. Las filas que no pasan la comprobación
+# quedan con `ok` a False y rellenas de NaN; para ellas hay que usar _solve, que recurre al
+# integrador adaptativo.
+@njit(parallel=True, cache=True)
+def solve_batch(y0, params, steps, substeps):
+    K = params.shape[0]  # Número de combinaciones de parámetros
+    out = np.empty((K, 4, steps))  # Resultados: una solución (S, L, I, R x días) por combinación
+    ok = np.empty(K, dtype=np.bool_)  # Filas cuya solución cumple la tolerancia
+    for k in prange(K):
+        coarse = integrate_slird(y0, params[k, 0], params[k, 1], params[k, 2], params[k, 3], params[k, 4], params[k, 5],
+                                 steps, substeps)
+        fine = integrate_slird(y0, params[k, 0], params[k, 1], params[k, 2], params[k, 3], params[k, 4], params[k, 5],
+                               steps, 2 * substeps)
+        ok[k] = np.abs(fine - coarse).max() / 15.0 <= _RK4_TOL  # Con NaN la comparación es falsa
+        if ok[k]:
+            out[k] = fine
+        else:
+            out[k] = np.nan
+    return out, ok
+
+# Resolvemos el modelo para unos parámetros dados. El resultado se guarda en caché,
+# así que volver a una combinación ya vista no repite la integración.
+@functools.lru_cache(maxsize=256)
+def _solve(beta, rho, delta, alpha, lambda_, gamma):
+    # Integramos con paso de un día y de medio día: con RK4 la diferencia entre ambas es unas
+    # 15 veces el error de la de medio día, así que sólo la usamos si esa estimación es pequeña
+    coarse = integrate_slird(_Y0_SLIRD, beta, rho, delta, alpha, lambda_, gamma, _T_EVAL.size, 1)
+    fine = integrate_slird(_Y0_SLIRD, beta, rho, delta, alpha, lambda_, gamma, _T_EVAL.size, 2)
+    if np.abs(fine - coarse).max() / 15.0 <= _RK4_TOL:  # Con NaN la comparación es falsa
+        solution = fine
+    else:
+        sol = pysolve_ivp(slird_model, (_T_EVAL[0], _T_EVAL[-1]), _Y0_SLIRD, method="RK45", t_eval=_T_EVAL,
+                          args=(beta, rho, delta, alpha, lambda_, gamma), rtol=1e-6, atol=1e-9, pass_dy_as_arg=True,
+                          max_num_steps=_MAX_NUM_STEPS)
+        if sol.success:
+            solution = np.ascontiguousarray(sol.y)  # Una fila contigua por variable
+        else:
+            # Si no termina, sol.y sólo cubre parte de los días: devolvemos NaN en todos para
+            # no dibujar (ni guardar en caché) una curva más corta que _T_EVAL
+            solution = np.full((_Y0_SLIRD.size, _T_EVAL.size), np.nan)
+    # Con float32 basta para dibujar las curvas y se envía la mitad de datos al navegador
+    solution = solution.astype(np.float32)
+    solution.flags.writeable = False  # Los arrays en caché se comparten entre llamadas
+    S, L, I, R = solution  # Cada fila es una componente contigua en memoria
+    return S, L, I, R
+
+# Creamos el gráfico del modelo SLIRD para unos parámetros dados
+def make_figure(beta, rho, delta, alpha, lambda_, gamma):
+    # Resolución de las ecuaciones diferenciales (en float y redondeados para reutilizar la caché
+    # y no compilar otra versión del integrador cuando Dash envía un entero)
+    S, L, I, R = _solve(round(float(beta), 6), round(float(rho), 6), round(float(delta), 6), round(float(alpha), 6),
+                        round(float(lambda_), 6), round(float(gamma), 6))
+
+    # Creamos el gráfico con Plotly (como diccionario, igual que acepta dcc.Graph)
+    fig = {
+        "data": [
+            {"x": _T_EVAL, "y": S, "type": "scatter", "mode": "lines", "name": "Susceptibles", "line": {"color": "#1f77b4"}},
+            {"x": _T_EVAL, "y": L, "type": "scatter", "mode": "lines", "name": "Latentes", "line": {"color": "#ff7f0e"}},
+            {"x": _T_EVAL, "y": I, "type": "scatter", "mode": "lines", "name": "Infectados", "line": {"color": "#d62728"}},
+            {"x": _T_EVAL, "y": R, "type": "scatter", "mode": "lines", "name": "Recuperados", "line": {"color": "#2ca02c"}},
+        ],
+        # Diseño del gráfico
+        "layout": {
+            "title": "Modelo SLIRD",
+            "xaxis": {"title": "Tiempo"},
+            "yaxis": {"title": "Proporción de la población"},
+            "hovermode": "x unified",
+            "plot_bgcolor": "#ffffff",
+            "paper_bgcolor": "#f4f6f9",
+            "font": {"family": "Roboto, sans-serif", "size": 12, "color": "#333"},
+            "legend": {
+                "x": 0.01, "y": 0.99, "traceorder": "normal",
+                "bgcolor": "rgba(255, 255, 255, 0.7)",
+                "bordercolor": "Black", "borderwidth": 1
+            },
+        },
+    }
+
+    return fig
+
+# Valores iniciales de los parámetros, por id del campo de entrada y en el orden de make_figure
+_DEFAULTS = {"beta": 0.3, "rho": 0.1, "delta": 0.05, "alpha": 0.01, "lambda": 0.01, "gamma": 0.1}
+
+# Precalculamos la gráfica con los valores iniciales de los campos de entrada, así la
+# primera carga de la página no tiene que esperar a resolver el modelo
+_DEFAULT_FIG = make_figure(*_DEFAULTS.values())
+
+# Estilos compartidos por las etiquetas y los campos de entrada de los parámetros
+_LABEL_STYLE = {'fontSize': '14px', 'fontWeight': '500'}
+_INPUT_STYLE = {
+    'width': '100%',
+    'padding': '12px',
+    'fontSize': '14px',
+    'borderRadius': '10px',
+    'border': '1px solid #ddd',
+    'backgroundColor': '#f9f9f9',
+    'color': '#333',
+}
 
 # Layout de la aplicación web
 app.layout = html.Div(
@@ -63,66 +235,18 @@ app.layout = html.Div(
                     }
                 ),
                 # Definimos las etiquetas y campos de entrada para los parámetros del modelo SLIRD
-                html.Label("β (Tasa de contacto):", style={'fontSize': '14px', 'fontWeight': '500'}),
-                dcc.Input(id="beta", type="number", value=0.3, step=0.01, style={  # Entrada para β
-                    'width': '100%',
-                    'padding': '12px',
-                    'fontSize': '14px',
-                    'borderRadius': '10px',
-                    'border': '1px solid #ddd',
-                    'backgroundColor': '#f9f9f9',
-                    'color': '#333',
-                }),
-                html.Label("ρ (Tasa de recuperación):", style={'fontSize': '14px', 'fontWeight': '500'}),
-                dcc.Input(id="rho", type="number", value=0.1, step=0.01, style={  # Entrada para ρ
-                    'width': '100%',
-                    'padding': '12px',
-                    'fontSize': '14px',
-                    'borderRadius': '10px',
-                    'border': '1px solid #ddd',
-                    'backgroundColor': '#f9f9f9',
-                    'color': '#333',
-                }),
-                html.Label("δ (Tasa de mortalidad):", style={'fontSize': '14px', 'fontWeight': '500'}),
-                dcc.Input(id="delta", type="number", value=0.05, step=0.01, style={  # Entrada para δ
-                    'width': '100%',
-                    'padding': '12px',
-                    'fontSize': '14px',
-                    'borderRadius': '10px',
-                    'border': '1px solid #ddd',
-                    'backgroundColor': '#f9f9f9',
-                    'color': '#333',
-                }),
-                html.Label("α (Ingreso de susceptibles):", style={'fontSize': '14px', 'fontWeight': '500'}),
-                dcc.Input(id="alpha", type="number", value=0.01, step=0.01, style={  # Entrada para α
-                    'width': '100%',
-                    'padding': '12px',
-                    'fontSize': '14px',
-                    'borderRadius': '10px',
-                    'border': '1px solid #ddd',
-                    'backgroundColor': '#f9f9f9',
-                    'color': '#333',
-                }),
-                html.Label("λ (Reinfección):", style={'fontSize': '14px', 'fontWeight': '500'}),
-                dcc.Input(id="lambda", type="number", value=0.01, step=0.01, style={  # Entrada para λ
-                    'width': '100%',
-                    'padding': '12px',
-                    'fontSize': '14px',
-                    'borderRadius': '10px',
-                    'border': '1px solid #ddd',
-                    'backgroundColor': '#f9f9f9',
-                    'color': '#333',
-                }),
-                html.Label("γ (Tasa de latente a infectado):", style={'fontSize': '14px', 'fontWeight': '500'}),
-                dcc.Input(id="gamma", type="number", value=0.1, step=0.01, style={  # Entrada para γ
-                    'width': '100%',
-                    'padding': '12px',
-                    'fontSize': '14px',
-                    'borderRadius': '10px',
-                    'border': '1px solid #ddd',
-                    'backgroundColor': '#f9f9f9',
-                    'color': '#333',
-                }),
+                html.Label("β (Tasa de contacto):", style=_LABEL_STYLE),
+                dcc.Input(id="beta", type="number", value=_DEFAULTS["beta"], step=0.01, debounce=True, style=_INPUT_STYLE),  # Entrada para β
+                html.Label("ρ (Tasa de recuperación):", style=_LABEL_STYLE),
+                dcc.Input(id="rho", type="number", value=_DEFAULTS["rho"], step=0.01, debounce=True, style=_INPUT_STYLE),  # Entrada para ρ
+                html.Label("δ (Tasa de mortalidad):", style=_LABEL_STYLE),
+                dcc.Input(id="delta", type="number", value=_DEFAULTS["delta"], step=0.01, debounce=True, style=_INPUT_STYLE),  # Entrada para δ
+                html.Label("α (Ingreso de susceptibles):", style=_LABEL_STYLE),
+                dcc.Input(id="alpha", type="number", value=_DEFAULTS["alpha"], step=0.01, debounce=True, style=_INPUT_STYLE),  # Entrada para α
+                html.Label("λ (Reinfección):", style=_LABEL_STYLE),
+                dcc.Input(id="lambda", type="number", value=_DEFAULTS["lambda"], step=0.01, debounce=True, style=_INPUT_STYLE),  # Entrada para λ
+                html.Label("γ (Tasa de latente a infectado):", style=_LABEL_STYLE),
+                dcc.Input(id="gamma", type="number", value=_DEFAULTS["gamma"], step=0.01, debounce=True, style=_INPUT_STYLE),  # Entrada para γ
             ]
         ),
         html.Div(  # Contenedor para el gráfico
@@ -132,7 +256,7 @@ app.layout = html.Div(
                 'height': '600px', 
                 'marginLeft': '30px'
             },
-            children=[dcc.Graph(id="slird-graph")]  # Gráfico para mostrar los resultados
+            children=[dcc.Graph(id="slird-graph", figure=_DEFAULT_FIG)]  # Gráfico para mostrar los resultados
         ),
     ]
 )
@@ -145,42 +269,11 @@ app.layout = html.Div(
      Input("delta", "value"),
      Input("alpha", "value"),
      Input("lambda", "value"),
-     Input("gamma", "value")]
+     Input("gamma", "value")],
+    prevent_initial_call=True  # La gráfica inicial ya viene precalculada en el layout
 )
 def update_graph(beta, rho, delta, alpha, lambda_, gamma):
-    # Condiciones iniciales
-    S0, L0, I0, R0 = 0.99, 0.0, 0.01, 0.0
-    y0 = [S0, L0, I0, R0]  # Inicializamos los valores del modelo
-    t = np.linspace(0, 160, 160)  # Tiempo de simulación
-
-    # Resolución de las ecuaciones diferenciales
-    solution = odeint(slird_model, y0, t, args=(beta, rho, delta, alpha, lambda_, gamma))
-    S, L, I, R = solution.T  # Transponemos para obtener cada componente
-
-    # Creamos el gráfico con Plotly
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=t, y=S, mode='lines', name='Susceptibles', line=dict(color='#1f77b4')))
-    fig.add_trace(go.Scatter(x=t, y=L, mode='lines', name='Latentes', line=dict(color='#ff7f0e')))
-    fig.add_trace(go.Scatter(x=t, y=I, mode='lines', name='Infectados', line=dict(color='#d62728')))
-    fig.add_trace(go.Scatter(x=t, y=R, mode='lines', name='Recuperados', line=dict(color='#2ca02c')))
-
-    # Actualizamos el diseño del gráfico
-    fig.update_layout(
-        title='Modelo SLIRD',
-        xaxis_title='Tiempo',
-        yaxis_title='Proporción de la población',
-        hovermode='x unified',
-        plot_bgcolor='#ffffff',
-        paper_bgcolor='#f4f6f9',
-        font=dict(family="Roboto, sans-serif", size=12, color="#333"),
-        legend=dict(
-            x=0.01, y=0.99, traceorder="normal",
-            bgcolor="rgba(255, 255, 255, 0.7)",
-            bordercolor="Black", borderwidth=1
-        )
-    )
-
-    return fig  # Devolvemos el gráfico actualizado
+    return make_figure(beta, rho, delta, alpha, lambda_, gamma)  # Devolvemos el gráfico actualizado
 
 # Ejecutamos el servidor
 if __name__ == "__main__":